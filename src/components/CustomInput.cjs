@@ -3,6 +3,10 @@
  */
 const blessed = require('blessed');
 
+// Patterns used on every keypress and cursor move, compiled once
+const CONTROL_CHAR_RE = /^[\x00-\x08\x0b-\x0c\x0e-\x1f\x7f\x0d]$/;
+const WHITESPACE_RE = /\s/;
+
 class CustomInput {
   constructor(options) {
     this.screen = options.screen;
@@ -112,7 +116,7 @@ class CustomInput {
         handled = true;
       } else if (ch && !key.ctrl && !key.meta) {
         // Regular character input
-        if (!/^[\x00-\x08\x0b-\x0c\x0e-\x1f\x7f\x0d]$/.test(ch)) {
+        if (!CONTROL_CHAR_RE.test(ch)) {
           this.value = this.value.slice(0, this.cursorPos) + ch + this.value.slice(this.cursorPos);
           this.cursorPos++;
           handled = true;
@@ -141,12 +145,12 @@ class CustomInput {
     let pos = this.cursorPos;
     
     // Skip current whitespace backwards
-    while (pos > 0 && /\s/.test(this.value[pos - 1])) {
+    while (pos > 0 && WHITESPACE_RE.test(this.value[pos - 1])) {
       pos--;
     }
     
     // Skip word characters backwards
-    while (pos > 0 && !/\s/.test(this.value[pos - 1])) {
+    while (pos > 0 && !WHITESPACE_RE.test(this.value[pos - 1])) {
       pos--;
     }
     
@@ -158,12 +162,12 @@ class CustomInput {
     const len = this.value.length;
     
     // Skip current word characters forwards
-    while (pos < len && !/\s/.test(this.value[pos])) {
+    while (pos < len && !WHITESPACE_RE.test(this.value[pos])) {
       pos++;
     }
     
     // Skip whitespace forwards
-    while (pos < len && /\s/.test(this.value[pos])) {
+    while (pos < len && WHITESPACE_RE.test(this.value[pos])) {
       pos++;
     }
     
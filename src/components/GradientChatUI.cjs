@@ -345,17 +345,26 @@ class GradientChatUI {
    * @param {number} count - Number of messages to remove
    */
   removeLastMessages(count) {
-    // Remove from the messages array
+    // Take the spinner line off first so only message lines are removed below
+    if (this.spinnerShowing) {
+      this.clearProgressBar();
+    }
+    
+    // Remove from the messages array, counting the log lines each message occupies
+    let lineCount = 0;
     for (let i = 0; i < count; i++) {
-      this.messagesBeforeSpinner.pop();
+      const msg = this.messagesBeforeSpinner.pop();
       this.rawMessages.pop();
+      if (msg !== undefined) {
+        lineCount += msg.split('\n').length;
+      }
     }
     
-    // Redraw the chat box with remaining messages
-    this.chatBox.setContent('');
-    this.messagesBeforeSpinner.forEach(msg => {
-      this.chatBox.add(msg);
-    });
+    // Drop just those lines, like the spinner does, so content that was never
+    // tracked as a message (welcome banner, resumed history) stays in place
+    if (lineCount > 0) {
+      this.chatBox.popLine(lineCount);
+    }
     
     this.screen.render();
   }
@@ -389,18 +398,15 @@ class GradientChatUI {
    * @param {string} content - The spinner character to display
    */
   setProgressBar(content) {
-    // If spinner is already showing, we need to redraw everything
     if (this.spinnerShowing) {
-      // Restore messages without spinner
-      this.chatBox.setContent('');
-      this.messagesBeforeSpinner.forEach(msg => {
-        this.chatBox.add(msg);
-      });
+      // Replace only the spinner line; re-adding every message each frame
+      // rebuilds the log content once per message
+      this.chatBox.setLine(this.chatBox.getLines().length - 1, content);
+    } else {
+      // Add the new spinner line
+      this.chatBox.add(content);
+      this.spinnerShowing = true;
     }
-    
-    // Add the new spinner line
-    this.chatBox.add(content);
-    this.spinnerShowing = true;
     // Scroll to bottom to ensure spinner is visible
     this.chatBox.setScrollPerc(100);
     this.screen.render();
@@ -411,11 +417,8 @@ class GradientChatUI {
    */
   clearProgressBar() {
     if (this.spinnerShowing) {
-      // Restore all messages without the spinner
-      this.chatBox.setContent('');
-      this.messagesBeforeSpinner.forEach(msg => {
-        this.chatBox.add(msg);
-      });
+      // Drop the spinner line, leaving the messages before it in place
+      this.chatBox.popLine();
       this.spinnerShowing = false;
     }
     this.screen.render();
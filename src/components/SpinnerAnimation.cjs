@@ -5,6 +5,7 @@ class SpinnerAnimation {
     this.isRunning = false;
     this.startTime = null;
     this.timeoutSeconds = null;
+    this.totalTimeDisplay = null; // Formatted timeout, fixed for the whole run
     
     // Spinner sequence: ◜ ◝ ◞ ◟
     this.spinnerFrames = ['◜ ', ' ◝', ' ◞', '◟ '];
@@ -66,6 +67,8 @@ class SpinnerAnimation {
     this.currentColor = this.getRandomColor();
     this.startTime = Date.now();
     this.timeoutSeconds = timeoutSeconds;
+    // The timeout doesn't change while running, so format it once rather than every frame
+    this.totalTimeDisplay = timeoutSeconds && timeoutSeconds > 0 ? this.formatTime(timeoutSeconds) : null;
     
     // Start the animation loop at 15fps (66.67ms)
     this.animate();
@@ -87,9 +90,8 @@ class SpinnerAnimation {
       const elapsedSeconds = elapsedMs / 1000;
       const elapsedTime = this.formatTime(elapsedSeconds);
       
-      if (this.timeoutSeconds && this.timeoutSeconds > 0) {
-        const totalTime = this.formatTime(this.timeoutSeconds);
-        stopwatchDisplay = ` (${elapsedTime} / ${totalTime})`;
+      if (this.totalTimeDisplay) {
+        stopwatchDisplay = ` (${elapsedTime} / ${this.totalTimeDisplay})`;
       } else {
         stopwatchDisplay = ` (${elapsedTime})`;
       }
@@ -126,6 +128,7 @@ class SpinnerAnimation {
     // Clear timing information
     this.startTime = null;
     this.timeoutSeconds = null;
+    this.totalTimeDisplay = null;
     
     // Clear the progress bar
     this.chatUI.clearProgressBar();
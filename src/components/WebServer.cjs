@@ -2,12 +2,35 @@ const http = require('http');
 const crypto = require('crypto');
 const fs = require('fs');
 const path = require('path');
+const os = require('os');
+const { spawn } = require('child_process');
 const ConfigManager = require('../managers/ConfigManager.cjs');
 const HistoryManager = require('../managers/HistoryManager.cjs');
 const AgentManager = require('../managers/AgentManager.cjs');
 const AgentWrapper = require('../services/AgentWrapper.cjs');
 const HistoryCompactor = require('../managers/HistoryCompactor.cjs');
 const { estimateTokenCount } = require('../utils/tokenEstimator.cjs');
+const { isBlank } = require('../utils/textUtils.cjs');
+const { statIfExists } = require('../utils/fsUtils.cjs');
+const { getAgentColor } = require('../utils/agentColors.cjs');
+
+// Space-separated slash-command arguments
+const COMMAND_ARG_RE = /[^ ]+/g;
+
+// Help text sent by /help, one system message per line
+const HELP_LINES = [
+  'Available commands:',
+  '/clear - Clear the chat history',
+  '/help - Show this help message',
+  '/compact - Compact the chat history',
+  '/select <agent> - Select agent for next prompt (or permanently in manual mode). Agent names can contain spaces.',
+  '/strategy [mode] - Show or set rotation strategy (round-robin, exhaustion, random, manual)',
+  '/agents - Show agent status and current configuration',
+  '/init - Initialize the project',
+  '/config - Open the configuration file',
+  '/instructions - Edit global agent instructions',
+  '/sh <command> - Execute shell command'
+];
 
 class WebServer {
   constructor() {
@@ -19,6 +42,7 @@ class WebServer {
     this.agentManager = null;
     this.historyCompactor = null;
     this.agentIsRunning = false;
+    this.staticFileCache = new Map(); // filename -> generated content, which never changes at runtime
     
     // Initialize managers
     this.initializeManagers();
@@ -38,7 +62,9 @@ class WebServer {
    * Update the current working path and reinitialize managers
    */
   updateWorkingPath(newPath) {
-    if (fs.existsSync(newPath) && fs.statSync(newPath).isDirectory()) {
+    // One stat call; a missing or inaccessible path yields null instead of throwing
+    const stats = statIfExists(newPath);
+    if (stats && stats.isDirectory()) {
       this.currentWorkingPath = newPath;
       this.initializeManagers();
       return true;
@@ -117,8 +143,6 @@ class WebServer {
    * Serve static files
    */
   serveStaticFile(res, filename, contentType) {
-    const filePath = path.join(__dirname, '..', 'web', filename);
-    
     try {
       const content = this.generateFileContent(filename);
       res.writeHead(200, { 'Content-Type': contentType });
@@ -130,19 +154,32 @@ class WebServer {
   }
   
   /**
-   * Generate content for web files (since they don't exist as separate files)
+   * Generate content for web files (since they don't exist as separate files).
+   * Each file is built once and served from the cache afterwards.
    */
   generateFileContent(filename) {
+    const cached = this.staticFileCache.get(filename);
+    if (cached !== undefined) {
+      return cached;
+    }
+    
+    let content;
     switch (filename) {
       case 'index.html':
-        return this.getIndexHtml();
+        content = this.getIndexHtml();
+        break;
       case 'style.css':
-        return this.getStyleCss();
+        content = this.getStyleCss();
+        break;
       case 'app.js':
-        return this.getAppJs();
+        content = this.getAppJs();
+        break;
       default:
         throw new Error(`Unknown file: ${filename}`);
     }
+    
+    this.staticFileCache.set(filename, content);
+    return content;
   }
   
   /**
@@ -175,7 +212,7 @@ class WebServer {
         try {
           // Handle tilde expansion
           if (trimmedPath.startsWith('~')) {
-            resolvedPath = trimmedPath.replace('~', require('os').homedir());
+            resolvedPath = trimmedPath.replace('~', os.homedir());
           } else if (path.isAbsolute(trimmedPath)) {
             resolvedPath = trimmedPath;
           } else {
@@ -191,8 +228,9 @@ class WebServer {
           return;
         }
         
-        // Check if path exists
-        if (!fs.existsSync(resolvedPath)) {
+        // Stat once to check both that the path exists and that it's a directory
+        const stats = statIfExists(resolvedPath);
+        if (!stats) {
           res.writeHead(400, { 'Content-Type': 'application/json' });
           res.end(JSON.stringify({ 
             success: false, 
@@ -202,21 +240,7 @@ class WebServer {
           return;
         }
         
-        // Check if it's a directory
-        let isDirectory;
-        try {
-          isDirectory = fs.statSync(resolvedPath).isDirectory();
-        } catch (error) {
-          res.writeHead(400, { 'Content-Type': 'application/json' });
-          res.end(JSON.stringify({ 
-            success: false, 
-            currentPath: this.currentWorkingPath,
-            message: `Cannot access path: ${resolvedPath}`
-          }));
-          return;
-        }
-        
-        if (!isDirectory) {
+        if (!stats.isDirectory()) {
           res.writeHead(400, { 'Content-Type': 'application/json' });
           res.end(JSON.stringify({ 
             success: false, 
@@ -285,9 +309,9 @@ class WebServer {
         prefix = input.substring(lastSlash + 1);
       } else if (input.startsWith('~')) {
         // Home directory path
-        const expandedPath = input.replace('~', require('os').homedir());
+        const expandedPath = input.replace('~', os.homedir());
         const lastSlash = expandedPath.lastIndexOf('/');
-        searchPath = lastSlash === -1 ? require('os').homedir() : expandedPath.substring(0, lastSlash);
+        searchPath = lastSlash === -1 ? os.homedir() : expandedPath.substring(0, lastSlash);
         prefix = expandedPath.substring(lastSlash + 1);
       } else {
         // Relative path
@@ -301,40 +325,40 @@ class WebServer {
         }
       }
       
-      // Check if search path exists
-      if (!fs.existsSync(searchPath) || !fs.statSync(searchPath).isDirectory()) {
+      // Check if search path exists (one stat call; missing or inaccessible paths yield null)
+      const searchStats = statIfExists(searchPath);
+      if (!searchStats || !searchStats.isDirectory()) {
         return [];
       }
       
       // Read directory contents
       const entries = fs.readdirSync(searchPath, { withFileTypes: true });
       
-      // Filter directories that start with the prefix
+      // Resolve per-call values once instead of per directory entry
+      const lowerPrefix = prefix.toLowerCase();
+      const homedir = os.homedir();
+      let toSuggestion;
+      if (input.startsWith('/')) {
+        toSuggestion = name => path.join(searchPath, name);
+      } else if (input.startsWith('~')) {
+        toSuggestion = name => path.join(searchPath, name).replace(homedir, '~');
+      } else {
+        toSuggestion = name => path.relative(this.currentWorkingPath, path.join(searchPath, name)) || name;
+      }
+      
+      // Filter directories that start with the prefix, then build paths only for the ones shown
       const matchingDirs = entries
         .filter(entry => entry.isDirectory() && 
                 !entry.name.startsWith('.') && // Skip hidden directories
-                entry.name.toLowerCase().startsWith(prefix.toLowerCase()))
-        .map(entry => {
-          // Build full path suggestion
-          let suggestion;
-          if (input.startsWith('/')) {
-            suggestion = path.join(searchPath, entry.name);
-          } else if (input.startsWith('~')) {
-            const homedir = require('os').homedir();
-            suggestion = path.join(searchPath, entry.name).replace(homedir, '~');
-          } else {
-            const relativePath = path.relative(this.currentWorkingPath, path.join(searchPath, entry.name));
-            suggestion = relativePath || entry.name;
-          }
-          
-          return {
-            name: entry.name,
-            path: suggestion,
-            isComplete: false
-          };
-        })
-        .sort((a, b) => a.name.localeCompare(b.name))
-        .slice(0, 10); // Limit to 10 suggestions
+                entry.name.toLowerCase().startsWith(lowerPrefix))
+        .map(entry => entry.name)
+        .sort((a, b) => a.localeCompare(b))
+        .slice(0, 10) // Limit to 10 suggestions
+        .map(name => ({
+          name,
+          path: toSuggestion(name),
+          isComplete: false
+        }));
       
       // If there's exactly one match, mark it as complete
       if (matchingDirs.length === 1) {
@@ -558,13 +582,18 @@ class WebServer {
    * Send WebSocket message
    */
   sendWebSocketMessage(clientId, data) {
+    if (!this.clients.has(clientId)) return;
+    
+    this.writeWebSocketFrame(clientId, this.createWebSocketFrame(JSON.stringify(data)));
+  }
+  
+  /**
+   * Write an already encoded frame to a client, dropping the client if the socket fails
+   */
+  writeWebSocketFrame(clientId, frameBuffer) {
     const client = this.clients.get(clientId);
     if (!client) return;
     
-    const message = JSON.stringify(data);
-    const messageBuffer = Buffer.from(message, 'utf8');
-    const frameBuffer = this.createWebSocketFrame(messageBuffer);
-    
     try {
       client.socket.write(frameBuffer);
     } catch (error) {
@@ -573,37 +602,40 @@ class WebServer {
   }
   
   /**
-   * Create WebSocket frame
+   * Create WebSocket frame.
+   * The header and UTF-8 payload are written into a single buffer,
+   * avoiding a separate payload buffer and a concat copy.
    */
-  createWebSocketFrame(payload) {
-    const payloadLength = payload.length;
-    let frame;
+  createWebSocketFrame(message) {
+    const payloadLength = Buffer.byteLength(message, 'utf8');
+    const headerLength = payloadLength < 126 ? 2 : (payloadLength < 65536 ? 4 : 10);
+    const frame = Buffer.allocUnsafe(headerLength + payloadLength);
     
+    frame[0] = 0x81; // Text frame
     if (payloadLength < 126) {
-      frame = Buffer.allocUnsafe(2);
-      frame[0] = 0x81; // Text frame
       frame[1] = payloadLength;
     } else if (payloadLength < 65536) {
-      frame = Buffer.allocUnsafe(4);
-      frame[0] = 0x81;
       frame[1] = 126;
       frame.writeUInt16BE(payloadLength, 2);
     } else {
-      frame = Buffer.allocUnsafe(10);
-      frame[0] = 0x81;
       frame[1] = 127;
       frame.writeBigUInt64BE(BigInt(payloadLength), 2);
     }
     
-    return Buffer.concat([frame, payload]);
+    frame.write(message, headerLength, 'utf8');
+    return frame;
   }
   
   /**
-   * Broadcast message to all clients
+   * Broadcast message to all clients.
+   * The message is serialized and framed once, then written to every client.
    */
   broadcast(data) {
-    for (const [clientId, client] of this.clients) {
-      this.sendWebSocketMessage(clientId, data);
+    if (this.clients.size === 0) return;
+    
+    const frameBuffer = this.createWebSocketFrame(JSON.stringify(data));
+    for (const clientId of [...this.clients.keys()]) {
+      this.writeWebSocketFrame(clientId, frameBuffer);
     }
   }
   
@@ -639,7 +671,7 @@ class WebServer {
     const inputTokens = estimateTokenCount(text);
     const agents = this.configManager.getAgents();
     if (agents.length > 0) {
-      const smallestContext = Math.min(...agents.map(a => a.contextWindowTokens));
+      const smallestContext = this.historyCompactor.getSmallestContextWindow();
       const maxInputTokens = Math.floor(smallestContext * 0.25); // 25% of smallest context
       
       if (inputTokens > maxInputTokens) {
@@ -848,7 +880,7 @@ class WebServer {
     if (cmd === 'select' && argsText.trim()) {
       args = [argsText.trim()];
     } else {
-      args = argsText.split(' ').filter(arg => arg.length > 0);
+      args = argsText.match(COMMAND_ARG_RE) || [];
     }
     
     switch (cmd) {
@@ -863,49 +895,11 @@ class WebServer {
         
       case 'help':
         // Send multiple separate messages to match TUI format
-        this.sendWebSocketMessage(clientId, {
-          type: 'system',
-          message: 'Available commands:'
-        });
-        this.sendWebSocketMessage(clientId, {
-          type: 'system',
-          message: '/clear - Clear the chat history'
-        });
-        this.sendWebSocketMessage(clientId, {
-          type: 'system',
-          message: '/help - Show this help message'
-        });
-        this.sendWebSocketMessage(clientId, {
-          type: 'system',
-          message: '/compact - Compact the chat history'
-        });
-        this.sendWebSocketMessage(clientId, {
-          type: 'system',
-          message: '/select <agent> - Select agent for next prompt (or permanently in manual mode). Agent names can contain spaces.'
-        });
-        this.sendWebSocketMessage(clientId, {
-          type: 'system',
-          message: '/strategy [mode] - Show or set rotation strategy (round-robin, exhaustion, random, manual)'
-        });
-        this.sendWebSocketMessage(clientId, {
-          type: 'system',
-          message: '/agents - Show agent status and current configuration'
-        });
-        this.sendWebSocketMessage(clientId, {
-          type: 'system',
-          message: '/init - Initialize the project'
-        });
-        this.sendWebSocketMessage(clientId, {
-          type: 'system',
-          message: '/config - Open the configuration file'
-        });
-        this.sendWebSocketMessage(clientId, {
-          type: 'system',
-          message: '/instructions - Edit global agent instructions'
-        });
-        this.sendWebSocketMessage(clientId, {
-          type: 'system',
-          message: '/sh <command> - Execute shell command'
+        HELP_LINES.forEach(line => {
+          this.sendWebSocketMessage(clientId, {
+            type: 'system',
+            message: line
+          });
         });
         break;
         
@@ -1003,30 +997,34 @@ class WebServer {
         
         // Execute shell command
         try {
-          const { spawn } = require('child_process');
           const process = spawn(shellCommand, { shell: true, cwd: this.currentWorkingPath });
           
           let stdout = '';
           let stderr = '';
           
+          process.stdout.setEncoding('utf8');
+          process.stderr.setEncoding('utf8');
+          
           process.stdout.on('data', (data) => {
-            stdout += data.toString();
+            stdout += data;
           });
           
           process.stderr.on('data', (data) => {
-            stderr += data.toString();
+            stderr += data;
           });
           
           process.on('close', (exitCode) => {
+            // Limit output size to prevent UI issues - using 25% of smallest context window.
+            // Computed once and shared by the stdout and stderr displays below.
+            const agents = this.configManager.getAgents();
+            let maxOutputSize = 10000; // Default fallback
+            if (agents.length > 0) {
+              const smallestContext = this.historyCompactor.getSmallestContextWindow();
+              maxOutputSize = Math.floor(smallestContext * 0.25 * 4); // 25% of smallest context window in characters
+            }
+            
             // Display output
-            if (stdout.trim()) {
-              // Limit output size to prevent UI issues - using 25% of smallest context window
-              const agents = this.configManager.getAgents();
-              let maxOutputSize = 10000; // Default fallback
-              if (agents.length > 0) {
-                const smallestContext = Math.min(...agents.map(a => a.contextWindowTokens));
-                maxOutputSize = Math.floor(smallestContext * 0.25 * 4); // 25% of smallest context window in characters
-              }
+            if (!isBlank(stdout)) {
               const displayOutput = stdout.length > maxOutputSize 
                 ? stdout.substring(0, maxOutputSize) + '\n... (output truncated)'
                 : stdout.trim();
@@ -1036,14 +1034,7 @@ class WebServer {
               });
             }
             
-            if (stderr.trim()) {
-              // Limit error output size to prevent UI issues - using 25% of smallest context window
-              const agents = this.configManager.getAgents();
-              let maxOutputSize = 10000; // Default fallback
-              if (agents.length > 0) {
-                const smallestContext = Math.min(...agents.map(a => a.contextWindowTokens));
-                maxOutputSize = Math.floor(smallestContext * 0.25 * 4); // 25% of smallest context window in characters
-              }
+            if (!isBlank(stderr)) {
               const displayError = stderr.length > maxOutputSize 
                 ? stderr.substring(0, maxOutputSize) + '\n... (error output truncated)'
                 : stderr.trim();
@@ -1900,7 +1891,25 @@ input:focus {
    * Get JavaScript application code
    */
   getAppJs() {
-    return `class TermaiteWebApp {
+    return `// Blessed color names mapped to CSS colors, shared by every formatted system message
+const BLESSED_COLOR_MAP = {
+    'red': '#ff4444',
+    'green': '#00ff00', 
+    'blue': '#4444ff',
+    'yellow': '#ffff00',
+    'cyan': '#00ffff',
+    'magenta': '#ff00ff',
+    'white': '#ffffff',
+    'gray': '#808080',
+    'grey': '#808080'
+};
+
+// Paired blessed.js formatting tags, plus line breaks
+const BOLD_TAG_RE = /\\{bold\\}(.*?)\\{\\/bold\\}/g;
+const COLOR_TAG_RE = /\\{([a-zA-Z0-9#]+)-fg\\}(.*?)\\{\\/([a-zA-Z0-9#]+)-fg\\}/g;
+const NEWLINE_RE = /\\n/g;
+
+class TermaiteWebApp {
     constructor() {
         this.socket = null;
         this.isConnected = false;
@@ -1943,44 +1952,26 @@ input:focus {
     
     formatAgentOutput(text) {
         // Simplified formatting to avoid regex issues
-        return this.escapeHtml(text).replace(/\\n/g, '<br>');
+        return this.escapeHtml(text).replaceAll('\\n', '<br>');
     }
     
     formatSystemMessage(text) {
         // Convert blessed.js-style formatting tags to HTML/CSS
+        // Only matched open/close pairs are converted, so stray braces in raw output can't leak styling
         let formatted = this.escapeHtml(text);
         
         // Handle bold tags
-        formatted = formatted.replace(/\\{bold\\}(.*?)\\{\\/bold\\}/g, '<strong>$1</strong>');
+        formatted = formatted.replace(BOLD_TAG_RE, '<strong>$1</strong>');
         
         // Handle color tags with dynamic agent colors
-        const colorRegex = /\\{([a-zA-Z0-9#]+)-fg\\}(.*?)\\{\\/([a-zA-Z0-9#]+)-fg\\}/g;
-        formatted = formatted.replace(colorRegex, (match, color, content, closeColor) => {
-            // Handle hex colors or named colors
-            if (color.startsWith('#')) {
-                return '<span style="color: ' + color + '">' + content + '</span>';
-            } else {
-                // Map blessed color names to CSS
-                const colorMap = {
-                    'red': '#ff4444',
-                    'green': '#00ff00', 
-                    'blue': '#4444ff',
-                    'yellow': '#ffff00',
-                    'cyan': '#00ffff',
-                    'magenta': '#ff00ff',
-                    'white': '#ffffff',
-                    'gray': '#808080',
-                    'grey': '#808080'
-                };
-                const cssColor = colorMap[color] || color;
-                return '<span style="color: ' + cssColor + '">' + content + '</span>';
-            }
+        formatted = formatted.replace(COLOR_TAG_RE, (match, color, content) => {
+            // Handle hex colors or named colors (map blessed color names to CSS)
+            const cssColor = color.startsWith('#') ? color : (BLESSED_COLOR_MAP[color] || color);
+            return '<span style="color: ' + cssColor + '">' + content + '</span>';
         });
         
         // Handle line breaks
-        formatted = formatted.replace(/\\n/g, '<br>');
-        
-        return formatted;
+        return formatted.replace(NEWLINE_RE, '<br>');
     }
     
     startSpinner() {
@@ -2736,28 +2727,8 @@ document.addEventListener('DOMContentLoaded', () => {
   }
   
   getAgentColor(agentName) {
-    // Rich color palette for agents (matching TUI)
-    const colors = [
-      '#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEAA7', '#DDA0DD',
-      '#98D8C8', '#F7DC6F', '#BB8FCE', '#85C1E9', '#F8C471', '#82E0AA',
-      '#FF8A80', '#80CBC4', '#81C784', '#FFB74D', '#F06292', '#9575CD',
-      '#4FC3F7', '#AED581', '#FFD54F', '#A1887F', '#90A4AE', '#EF5350',
-      '#26A69A', '#AB47BC', '#5C6BC0', '#42A5F5', '#66BB6A', '#FFCA28',
-      '#FF7043', '#8D6E63', '#78909C', '#EC407A', '#7E57C2', '#29B6F6',
-      '#FFAB91', '#C5E1A5', '#FFF176', '#BCAAA4', '#B0BEC5', '#FFCDD2',
-      '#E1BEE7', '#C8E6C9', '#FFF9C4', '#D7CCC8', '#CFD8DC', '#FFCCBC'
-    ];
-    
-    // Use same hash algorithm as TUI
-    let hash = 0;
-    for (let i = 0; i < agentName.length; i++) {
-      const char = agentName.charCodeAt(i);
-      hash = ((hash << 5) - hash) + char;
-      hash = hash & hash; // Convert to 32bit integer
-    }
-    
-    const colorIndex = Math.abs(hash) % colors.length;
-    return colors[colorIndex];
+    // Same palette and hash as the TUI
+    return getAgentColor(agentName);
   }
 }
 
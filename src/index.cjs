@@ -33,10 +33,10 @@ const AgentWrapper = require('./services/AgentWrapper.cjs');
 const HistoryCompactor = require('./managers/HistoryCompactor.cjs');
 const AgentStatusManager = require('./managers/AgentStatusManager.cjs');
 const { estimateTokenCount } = require('./utils/tokenEstimator.cjs');
+const { isBlank } = require('./utils/textUtils.cjs');
+const { getAgentColor } = require('./utils/agentColors.cjs');
 const SpinnerAnimation = require('./components/SpinnerAnimation.cjs');
 const { spawn } = require('child_process');
-const os = require('os');
-const path = require('path');
 const fs = require('fs');
 
 const pkg = require('../package.json');
@@ -83,9 +83,10 @@ if (webArg) {
   
   // If web argument has a value, parse it
   if (webArg && webArg !== true && typeof webArg === 'string') {
-    if (webArg.includes(':')) {
-      [host, port] = webArg.split(':');
-      port = parseInt(port, 10);
+    const colon = webArg.indexOf(':');
+    if (colon !== -1) {
+      host = webArg.substring(0, colon);
+      port = parseInt(webArg.substring(colon + 1), 10);
     } else {
       port = parseInt(webArg, 10);
     }
@@ -140,11 +141,13 @@ if (argv.prompt) {
     configManager.propagateInstructions();
     
     // Execute the agent command with global timeout
+    // Nothing is written to history until an agent succeeds, so one snapshot serves every retry
     const globalTimeout = configManager.getGlobalTimeout();
-    AgentWrapper.executeAgentCommand(agent, argv.prompt, historyManager.readHistory(), globalTimeout)
+    const history = historyManager.readHistory();
+    AgentWrapper.executeAgentCommand(agent, argv.prompt, history, globalTimeout)
       .then(result => {
         // Check if agent failed (non-zero exit code or empty output)
-        const isOutputEmpty = !result.stdout || result.stdout.trim() === '';
+        const isOutputEmpty = isBlank(result.stdout);
         if (result.exitCode !== 0 || isOutputEmpty) {
           if (isOutputEmpty) {
             console.error(`Agent ${agent.name} failed: Empty response received`);
@@ -180,9 +183,9 @@ if (argv.prompt) {
               // Propagate instructions before retry
               configManager.propagateInstructions();
               
-              AgentWrapper.executeAgentCommand(nextAgent, argv.prompt, historyManager.readHistory(), globalTimeout)
+              AgentWrapper.executeAgentCommand(nextAgent, argv.prompt, history, globalTimeout)
                 .then(retryResult => {
-                  const isRetryOutputEmpty = !retryResult.stdout || retryResult.stdout.trim() === '';
+                  const isRetryOutputEmpty = isBlank(retryResult.stdout);
                   if (retryResult.exitCode === 0 && !isRetryOutputEmpty) {
                     // Success
                     console.log(retryResult.stdout);
@@ -269,9 +272,9 @@ if (argv.prompt) {
             
             console.error(`Retrying with agent: ${nextAgent.name}`);
             
-            AgentWrapper.executeAgentCommand(nextAgent, argv.prompt, historyManager.readHistory(), globalTimeout)
+            AgentWrapper.executeAgentCommand(nextAgent, argv.prompt, history, globalTimeout)
               .then(retryResult => {
-                const isRetryOutputEmpty = !retryResult.stdout || retryResult.stdout.trim() === '';
+                const isRetryOutputEmpty = isBlank(retryResult.stdout);
                 if (retryResult.exitCode === 0 && !isRetryOutputEmpty) {
                   // Success
                   console.log(retryResult.stdout);
@@ -391,10 +394,33 @@ const agentStatusManager = new AgentStatusManager(configManager, historyManager,
 // Create the chat UI
 const chatUI = new GradientChatUI(historyManager);
 
+// Help text shown by /help and after an unknown command
+const HELP_LINES = [
+  'Available commands:',
+  '/clear - Clear the chat history',
+  '/exit - Exit the application',
+  '/help - Show this help message',
+  '/compact - Compact the chat history',
+  '/select <agent> - Select agent for next prompt (or permanently in manual mode). Agent names can contain spaces.',
+  '/strategy [mode] - Show or set rotation strategy (round-robin, exhaustion, random, manual)',
+  '/agents - Show agent status and current configuration',
+  '/init - Initialize the project',
+  '/config - Open the configuration file',
+  '/instructions - Edit global agent instructions',
+  '/sh <command> - Execute shell command'
+];
+
+// Patterns shared by the render helpers, compiled once at startup
+const BLESSED_TAG_RE = /\{[^}]+\}/g;
+const AGENT_ANNOUNCEMENT_RE = /Agent \(([^)]+)\):/;
+const COMMAND_ARG_RE = /[^ ]+/g; // Space-separated slash-command arguments
+
 // Helper to strip blessed formatting tags for accurate width calculations
 function stripBlessedTags(text) {
   if (!text) return '';
-  return text.replace(/\{[^}]+\}/g, '');
+  // Plain text has no tags to strip; skip the regex scan entirely
+  if (!text.includes('{')) return text;
+  return text.replace(BLESSED_TAG_RE, '');
 }
 
 // Helper to shorten a path from the left with an ellipsis if too long
@@ -461,7 +487,7 @@ if (argv.continue && loadedHistory.length > 0) {
       historyContent += `${entry.text}\n`;
     } else if (entry.sender === 'agent-announcement') {
       // Display agent announcements with color coding
-      const agentMatch = entry.text.match(/Agent \(([^)]+)\):/);
+      const agentMatch = entry.text.match(AGENT_ANNOUNCEMENT_RE);
       if (agentMatch) {
         const agentName = agentMatch[1];
         const color = getAgentColor(agentName);
@@ -533,7 +559,7 @@ async function handleSlashCommand(text) {
   if (command === 'select' && argsText.trim()) {
     args = [argsText.trim()];
   } else {
-    args = argsText.split(' ').filter(arg => arg.length > 0);
+    args = argsText.match(COMMAND_ARG_RE) || [];
   }
   
   switch (command) {
@@ -550,18 +576,7 @@ async function handleSlashCommand(text) {
       break;
       
     case 'help':
-      chatUI.addMessage('Available commands:', 'system');
-      chatUI.addMessage('/clear - Clear the chat history', 'system');
-      chatUI.addMessage('/exit - Exit the application', 'system');
-      chatUI.addMessage('/help - Show this help message', 'system');
-      chatUI.addMessage('/compact - Compact the chat history', 'system');
-      chatUI.addMessage('/select <agent> - Select agent for next prompt (or permanently in manual mode). Agent names can contain spaces.', 'system');
-      chatUI.addMessage('/strategy [mode] - Show or set rotation strategy (round-robin, exhaustion, random, manual)', 'system');
-      chatUI.addMessage('/agents - Show agent status and current configuration', 'system');
-      chatUI.addMessage('/init - Initialize the project', 'system');
-      chatUI.addMessage('/config - Open the configuration file', 'system');
-      chatUI.addMessage('/instructions - Edit global agent instructions', 'system');
-      chatUI.addMessage('/sh <command> - Execute shell command', 'system');
+      HELP_LINES.forEach(line => chatUI.addMessage(line, 'system'));
       break;
       
     case 'compact':
@@ -735,7 +750,7 @@ async function handleSlashCommand(text) {
             chatUI.getScreen().render();
             const result = await AgentWrapper.executeAgentCommand(agent, '/init', [], globalTimeout, true);
             // Check if initialization failed due to empty response
-            const isOutputEmpty = !result.stdout || result.stdout.trim() === '';
+            const isOutputEmpty = isBlank(result.stdout);
             if (result.exitCode !== 0 || isOutputEmpty) {
               if (isOutputEmpty) {
                 chatUI.addMessage(`Warning: ${agent.name} initialization failed: Empty response received`, 'system');
@@ -770,7 +785,7 @@ async function handleSlashCommand(text) {
       break;
       
     case 'instructions':
-      const instructionsPath = path.join(os.homedir(), '.termaite', 'TERMAITE.md');
+      const instructionsPath = configManager.instructionsPath;
       const instructionsEditor = process.env.EDITOR || 'vi';
       
       chatUI.addMessage(`Opening instructions file: ${instructionsPath}`, 'system');
@@ -827,7 +842,6 @@ async function handleSlashCommand(text) {
       
       // Execute shell command
       try {
-        const { spawn } = require('child_process');
         const process = spawn(shellCommand, { shell: true, cwd: historyManager.projectPath });
         
         let stdout = '';
@@ -836,40 +850,38 @@ async function handleSlashCommand(text) {
         // Start spinner
         spinnerAnimation.start();
         
+        process.stdout.setEncoding('utf8');
+        process.stderr.setEncoding('utf8');
+        
         process.stdout.on('data', (data) => {
-          stdout += data.toString();
+          stdout += data;
         });
         
         process.stderr.on('data', (data) => {
-          stderr += data.toString();
+          stderr += data;
         });
         
         process.on('close', (exitCode) => {
           spinnerAnimation.stop();
           
+          // Limit output size to prevent UI issues - using 25% of smallest context window.
+          // Computed once and shared by the stdout and stderr displays below.
+          const agents = configManager.getAgents();
+          let maxOutputSize = 10000; // Default fallback
+          if (agents.length > 0) {
+            const smallestContext = historyCompactor.getSmallestContextWindow();
+            maxOutputSize = Math.floor(smallestContext * 0.25 * 4); // 25% of smallest context window in characters
+          }
+          
           // Display output
-          if (stdout.trim()) {
-            // Limit output size to prevent UI issues - using 25% of smallest context window
-            const agents = configManager.getAgents();
-            let maxOutputSize = 10000; // Default fallback
-            if (agents.length > 0) {
-              const smallestContext = Math.min(...agents.map(a => a.contextWindowTokens));
-              maxOutputSize = Math.floor(smallestContext * 0.25 * 4); // 25% of smallest context window in characters
-            }
+          if (!isBlank(stdout)) {
             const displayOutput = stdout.length > maxOutputSize 
               ? stdout.substring(0, maxOutputSize) + '\n... (output truncated)'
               : stdout.trim();
             chatUI.addMessage(displayOutput, 'system');
           }
           
-          if (stderr.trim()) {
-            // Limit error output size to prevent UI issues - using 25% of smallest context window
-            const agents = configManager.getAgents();
-            let maxOutputSize = 10000; // Default fallback
-            if (agents.length > 0) {
-              const smallestContext = Math.min(...agents.map(a => a.contextWindowTokens));
-              maxOutputSize = Math.floor(smallestContext * 0.25 * 4); // 25% of smallest context window in characters
-            }
+          if (!isBlank(stderr)) {
             const displayError = stderr.length > maxOutputSize 
               ? stderr.substring(0, maxOutputSize) + '\n... (error output truncated)'
               : stderr.trim();
@@ -933,51 +945,10 @@ async function handleSlashCommand(text) {
       
     default:
       chatUI.addMessage(`Unknown command: ${command}`, 'system');
-      chatUI.addMessage('Available commands:', 'system');
-      chatUI.addMessage('/clear - Clear the chat history', 'system');
-      chatUI.addMessage('/exit - Exit the application', 'system');
-      chatUI.addMessage('/help - Show this help message', 'system');
-      chatUI.addMessage('/compact - Compact the chat history', 'system');
-      chatUI.addMessage('/select <agent> - Select agent for next prompt (or permanently in manual mode). Agent names can contain spaces.', 'system');
-      chatUI.addMessage('/strategy [mode] - Show or set rotation strategy (round-robin, exhaustion, random, manual)', 'system');
-      chatUI.addMessage('/agents - Show agent status and current configuration', 'system');
-      chatUI.addMessage('/init - Initialize the project', 'system');
-      chatUI.addMessage('/config - Open the configuration file', 'system');
-      chatUI.addMessage('/instructions - Edit global agent instructions', 'system');
-      chatUI.addMessage('/sh <command> - Execute shell command', 'system');
+      HELP_LINES.forEach(line => chatUI.addMessage(line, 'system'));
   }
 }
 
-// Helper function to get agent color with rich 256-color palette
-function getAgentColor(agentName) {
-  // Rich 256-color palette for agents with good contrast and distinctiveness
-  const colors = [
-    // Bright primary colors
-    '#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEAA7', '#DDA0DD',
-    '#98D8C8', '#F7DC6F', '#BB8FCE', '#85C1E9', '#F8C471', '#82E0AA',
-    // Vibrant secondary colors  
-    '#FF8A80', '#80CBC4', '#81C784', '#FFB74D', '#F06292', '#9575CD',
-    '#4FC3F7', '#AED581', '#FFD54F', '#A1887F', '#90A4AE', '#EF5350',
-    // Rich tertiary colors
-    '#26A69A', '#AB47BC', '#5C6BC0', '#42A5F5', '#66BB6A', '#FFCA28',
-    '#FF7043', '#8D6E63', '#78909C', '#EC407A', '#7E57C2', '#29B6F6',
-    // Additional vibrant options
-    '#FFAB91', '#C5E1A5', '#FFF176', '#BCAAA4', '#B0BEC5', '#FFCDD2',
-    '#E1BEE7', '#C8E6C9', '#FFF9C4', '#D7CCC8', '#CFD8DC', '#FFCCBC'
-  ];
-  
-  // Use a more sophisticated hash for better color distribution
-  let hash = 0;
-  for (let i = 0; i < agentName.length; i++) {
-    const char = agentName.charCodeAt(i);
-    hash = ((hash << 5) - hash) + char;
-    hash = hash & hash; // Convert to 32bit integer
-  }
-  
-  const colorIndex = Math.abs(hash) % colors.length;
-  return colors[colorIndex];
-}
-
 // Track if we need to use a specific agent for the first interaction
 let firstInteraction = true;
 let overrideAgent = null;
@@ -1003,7 +974,9 @@ chatUI.getInputBox().on('submit', async (text) => {
   if (text) {
     // Handle slash commands
     if (text.startsWith('/')) {
-      const command = text.substring(1).split(' ')[0];
+      // Command name runs up to the first space; slice it out without splitting the whole line
+      const firstSpace = text.indexOf(' ');
+      const command = text.substring(1, firstSpace === -1 ? text.length : firstSpace);
       
       // Special handling for /exit - only log for arrow navigation, don't show in chat
       if (command === 'exit') {
@@ -1037,7 +1010,7 @@ chatUI.getInputBox().on('submit', async (text) => {
     const inputTokens = estimateTokenCount(text);
     const agents = configManager.getAgents();
     if (agents.length > 0) {
-      const smallestContext = Math.min(...agents.map(a => a.contextWindowTokens));
+      const smallestContext = historyCompactor.getSmallestContextWindow();
       const maxInputTokens = Math.floor(smallestContext * 0.25); // 25% of smallest context
       
       if (inputTokens > maxInputTokens) {
@@ -1123,11 +1096,11 @@ chatUI.getInputBox().on('submit', async (text) => {
       };
       chatUI.getScreen().on('keypress', escHandler);
       
+      // Snapshot history once; fallback agents reuse it instead of re-reading the file
+      const history = historyManager.readHistory();
+      
       // Execute the agent command with global timeout
       try {
-        const history = historyManager.readHistory();
-        const globalTimeout = configManager.getGlobalTimeout();
-        
         // Check if automatic compaction is needed before processing (including incoming text)
         if (historyCompactor.isCompactionNeeded(text)) {
           chatUI.addMessage('Auto-compacting history to maintain context window...', 'system');
@@ -1153,7 +1126,7 @@ chatUI.getInputBox().on('submit', async (text) => {
         const result = await AgentWrapper.executeAgentCommand(agent, text, history, globalTimeout);
         
         // Check if agent failed (non-zero exit code or empty output)
-        const isOutputEmpty = !result.stdout || result.stdout.trim() === '';
+        const isOutputEmpty = isBlank(result.stdout);
         if (result.exitCode !== 0 || isOutputEmpty) {
           // Exit code 137 means SIGKILL (128 + 9)
           // Don't show anything for cancellation - already handled by ESC handler
@@ -1199,7 +1172,7 @@ chatUI.getInputBox().on('submit', async (text) => {
                 
                 try {
                   const retryResult = await AgentWrapper.executeAgentCommand(nextAgent, text, history, globalTimeout);
-                  const isRetryOutputEmpty = !retryResult.stdout || retryResult.stdout.trim() === '';
+                  const isRetryOutputEmpty = isBlank(retryResult.stdout);
                   
                   if (retryResult.exitCode === 0 && !isRetryOutputEmpty) {
                     // Success
@@ -1284,10 +1257,9 @@ chatUI.getInputBox().on('submit', async (text) => {
               });
               
               try {
-                const history = historyManager.readHistory();
                 configManager.propagateInstructions();
                 const retryResult = await AgentWrapper.executeAgentCommand(nextAgent, text, history, globalTimeout);
-                const isRetryOutputEmpty = !retryResult.stdout || retryResult.stdout.trim() === '';
+                const isRetryOutputEmpty = isBlank(retryResult.stdout);
                 
                 if (retryResult.exitCode === 0 && !isRetryOutputEmpty) {
                   // Success
@@ -2,6 +2,9 @@ const fs = require('fs');
 const path = require('path');
 const os = require('os');
 
+// Rotation strategies accepted by setStrategy/updateRotationStrategy
+const VALID_STRATEGIES = new Set(['round-robin', 'exhaustion', 'random', 'manual']);
+
 class AgentManager {
   constructor(configManager) {
     this.configManager = configManager;
@@ -85,10 +88,11 @@ class AgentManager {
     switch (this.rotationStrategy) {
       case 'round-robin': {
         // Compute next without mutating currentAgentIndex
+        const availableByName = this.mapAgentsByName(availableAgents);
         for (let i = 0; i < this.agents.length; i++) {
           const index = (this.currentAgentIndex + i) % this.agents.length;
           const agent = this.agents[index];
-          const availableAgent = availableAgents.find(a => a.name === agent.name);
+          const availableAgent = availableByName.get(agent.name);
           if (availableAgent) {
             return availableAgent;
           }
@@ -158,6 +162,22 @@ class AgentManager {
     }
   }
 
+  /**
+   * Index agents by name for constant-time lookups while scanning the agent list.
+   * The first agent wins if names repeat, matching Array.prototype.find.
+   * @param {array} agents - The agents to index
+   * @returns {Map<string, object>} Agent name -> agent
+   */
+  mapAgentsByName(agents) {
+    const byName = new Map();
+    for (const agent of agents) {
+      if (!byName.has(agent.name)) {
+        byName.set(agent.name, agent);
+      }
+    }
+    return byName;
+  }
+
   /**
    * Get the next agent using the round-robin strategy
    * @param {array} availableAgents - The list of available agents
@@ -167,10 +187,11 @@ class AgentManager {
     // Round-robin: Rotate through all agents in order
     // Keep incrementing until we find an available agent
     // Note: This modifies this.currentAgentIndex which affects the starting point for next call
+    const availableByName = this.mapAgentsByName(availableAgents);
     for (let i = 0; i < this.agents.length; i++) {
       const index = (this.currentAgentIndex + i) % this.agents.length;
       const agent = this.agents[index];
-      const availableAgent = availableAgents.find(a => a.name === agent.name);
+      const availableAgent = availableByName.get(agent.name);
       
       if (availableAgent) {
         // Move to next agent for next call
@@ -195,9 +216,10 @@ class AgentManager {
     // Exhaustion strategy: Always try agents in priority order (list order)
     // Try the first available agent in the original list order
     // Unlike round-robin, we always start from the beginning of the list
+    const availableByName = this.mapAgentsByName(availableAgents);
     for (let i = 0; i < this.agents.length; i++) {
       const agent = this.agents[i];
-      const availableAgent = availableAgents.find(a => a.name === agent.name);
+      const availableAgent = availableByName.get(agent.name);
       
       if (availableAgent) {
         // Found the highest priority available agent
@@ -317,26 +339,28 @@ class AgentManager {
   /**
    * Get the remaining cooldown time for an agent
    * @param {string} agentName - The name of the agent
+   * @param {number} [now=Date.now()] - Current time in milliseconds
    * @returns {number} Remaining cooldown time in milliseconds, or 0 if not in cooldown
    */
-  getRemainingCooldown(agentName) {
+  getRemainingCooldown(agentName, now = Date.now()) {
     const agentStatus = this.failedAgents.get(agentName);
     if (!agentStatus) {
       return 0;
     }
     
-    const remaining = agentStatus.cooldownUntil - Date.now();
+    const remaining = agentStatus.cooldownUntil - now;
     return Math.max(0, remaining);
   }
 
   /**
    * Get the effective timeout for an agent (maximum of cooldown and timeout buffer)
    * @param {string} agentName - The name of the agent
+   * @param {number} [now=Date.now()] - Current time in milliseconds
    * @returns {number} Remaining effective timeout in milliseconds, or 0 if agent is available
    */
-  getEffectiveTimeout(agentName) {
-    const cooldownRemaining = this.getRemainingCooldown(agentName);
-    const timeoutBufferRemaining = this.getRemainingTimeoutBuffer(agentName);
+  getEffectiveTimeout(agentName, now = Date.now()) {
+    const cooldownRemaining = this.getRemainingCooldown(agentName, now);
+    const timeoutBufferRemaining = this.getRemainingTimeoutBuffer(agentName, now);
     
     // Return the longer of the two timeouts
     return Math.max(cooldownRemaining, timeoutBufferRemaining);
@@ -345,10 +369,11 @@ class AgentManager {
   /**
    * Check if an agent is effectively unavailable due to any timeout mechanism
    * @param {string} agentName - The name of the agent
+   * @param {number} [now=Date.now()] - Current time in milliseconds
    * @returns {boolean} True if the agent is unavailable due to any timeout
    */
-  isAgentUnavailable(agentName) {
-    return this.getEffectiveTimeout(agentName) > 0;
+  isAgentUnavailable(agentName, now = Date.now()) {
+    return this.getEffectiveTimeout(agentName, now) > 0;
   }
 
   /**
@@ -400,9 +425,10 @@ class AgentManager {
   /**
    * Check if an agent is in timeout buffer (recently used)
    * @param {string} agentName - The name of the agent
+   * @param {number} [now=Date.now()] - Current time in milliseconds
    * @returns {boolean} True if the agent is in timeout buffer, false otherwise
    */
-  isAgentInTimeoutBuffer(agentName) {
+  isAgentInTimeoutBuffer(agentName, now = Date.now()) {
     const timeoutBuffer = this.getAgentTimeoutBuffer(agentName);
     if (timeoutBuffer <= 0) {
       return false; // No timeout buffer configured
@@ -413,16 +439,17 @@ class AgentManager {
       return false; // Agent has never been used
     }
 
-    const timeSinceLastUse = Date.now() - lastUsed;
+    const timeSinceLastUse = now - lastUsed;
     return timeSinceLastUse < timeoutBuffer;
   }
 
   /**
    * Get the remaining timeout buffer time for an agent
    * @param {string} agentName - The name of the agent
+   * @param {number} [now=Date.now()] - Current time in milliseconds
    * @returns {number} Remaining timeout buffer time in milliseconds, or 0 if not in timeout
    */
-  getRemainingTimeoutBuffer(agentName) {
+  getRemainingTimeoutBuffer(agentName, now = Date.now()) {
     const timeoutBuffer = this.getAgentTimeoutBuffer(agentName);
     if (timeoutBuffer <= 0) {
       return 0;
@@ -433,7 +460,7 @@ class AgentManager {
       return 0;
     }
 
-    const timeSinceLastUse = Date.now() - lastUsed;
+    const timeSinceLastUse = now - lastUsed;
     const remaining = timeoutBuffer - timeSinceLastUse;
     return Math.max(0, remaining);
   }
@@ -448,7 +475,7 @@ class AgentManager {
       strategy = 'exhaustion';
     }
     
-    if (['round-robin', 'exhaustion', 'random', 'manual'].includes(strategy)) {
+    if (VALID_STRATEGIES.has(strategy)) {
       this.rotationStrategy = strategy;
       this.saveState();
     }
@@ -487,7 +514,7 @@ class AgentManager {
       strategy = 'exhaustion';
     }
     
-    if (['round-robin', 'exhaustion', 'random', 'manual'].includes(strategy)) {
+    if (VALID_STRATEGIES.has(strategy)) {
       this.rotationStrategy = strategy;
       this.saveState();
       
@@ -523,6 +550,8 @@ class AgentManager {
   getAgentStatus() {
     // Get all agents (enabled and disabled) for status display
     const allAgents = this.configManager.getAgents();
+    // One timestamp for every agent, so the reported fields agree with each other
+    const now = Date.now();
     
     return {
       strategy: this.rotationStrategy,
@@ -532,13 +561,13 @@ class AgentManager {
       agents: allAgents.map(agent => ({
         name: agent.name,
         enabled: agent.enabled !== false, // Default to true if not specified
-        available: agent.enabled !== false && !this.isAgentUnavailable(agent.name),
+        available: agent.enabled !== false && !this.isAgentUnavailable(agent.name, now),
         failureCount: this.failedAgents.get(agent.name)?.failureCount || 0,
         cooldownUntil: this.failedAgents.get(agent.name)?.cooldownUntil || null,
-        remainingCooldown: this.getRemainingCooldown(agent.name),
-        inTimeoutBuffer: this.isAgentInTimeoutBuffer(agent.name),
-        remainingTimeoutBuffer: this.getRemainingTimeoutBuffer(agent.name),
-        effectiveTimeout: this.getEffectiveTimeout(agent.name),
+        remainingCooldown: this.getRemainingCooldown(agent.name, now),
+        inTimeoutBuffer: this.isAgentInTimeoutBuffer(agent.name, now),
+        remainingTimeoutBuffer: this.getRemainingTimeoutBuffer(agent.name, now),
+        effectiveTimeout: this.getEffectiveTimeout(agent.name, now),
         timeoutBuffer: this.getAgentTimeoutBuffer(agent.name)
       }))
     };
@@ -1,4 +1,4 @@
-const { estimateTokenCount } = require('../utils/tokenEstimator.cjs');
+const { getAgentColor } = require('../utils/agentColors.cjs');
 
 class AgentStatusManager {
   constructor(configManager, historyManager, historyCompactor) {
@@ -13,10 +13,8 @@ class AgentStatusManager {
    * @returns {number} Percentage of context window left (0-100).
    */
   getContextUsagePercentageLeft(agent) {
-    const history = this.historyManager.readHistory();
-    const totalTokenCount = history.reduce((total, entry) => {
-      return total + estimateTokenCount(entry.text);
-    }, 0);
+    // Shares the compactor's cached stats, so unchanged history is not re-read on every refresh
+    const totalTokenCount = this.historyCompactor.getHistoryStats().tokens;
 
     const contextWindow = agent.contextWindowTokens;
     if (!contextWindow || contextWindow <= 0) {
@@ -45,27 +43,12 @@ class AgentStatusManager {
 
   /**
    * Deterministically map an agent name to a distinct color (hex string)
-   * Matches the palette behavior used in the UI agent announcements
+   * Uses the shared palette in utils/agentColors.cjs, so it matches the UI agent announcements
    * @param {string} agentName
    * @returns {string} Color string (can be hex like #FF6B6B)
    */
   getAgentColor(agentName) {
-    const colors = [
-      '#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEAA7', '#DDA0DD',
-      '#98D8C8', '#F7DC6F', '#BB8FCE', '#85C1E9', '#F8C471', '#82E0AA',
-      '#FF8A80', '#80CBC4', '#81C784', '#FFB74D', '#F06292', '#9575CD',
-      '#4FC3F7', '#AED581', '#FFD54F', '#A1887F', '#90A4AE', '#EF5350',
-      '#26A69A', '#AB47BC', '#5C6BC0', '#42A5F5', '#66BB6A', '#FFCA28',
-      '#FF7043', '#8D6E63', '#78909C', '#EC407A', '#7E57C2', '#29B6F6',
-      '#FFAB91', '#C5E1A5', '#FFF176', '#BCAAA4', '#B0BEC5', '#FFCDD2',
-      '#E1BEE7', '#C8E6C9', '#FFF9C4', '#D7CCC8', '#CFD8DC', '#FFCCBC'
-    ];
-    let hash = 0;
-    for (let i = 0; i < agentName.length; i++) {
-      hash = ((hash << 5) - hash) + agentName.charCodeAt(i);
-      hash |= 0;
-    }
-    return colors[Math.abs(hash) % colors.length];
+    return getAgentColor(agentName);
   }
 
   /**
@@ -1,12 +1,31 @@
 const fs = require('fs');
 const path = require('path');
 const os = require('os');
+const { fileStamp } = require('../utils/fsUtils.cjs');
+
+// Timeout buffer format: number + unit (e.g. "30s", "5m", "1h", "2d")
+const TIMEOUT_BUFFER_RE = /^(\d+)([smhd])$/;
+const TIMEOUT_BUFFER_MULTIPLIERS = {
+  's': 1000,        // seconds to milliseconds
+  'm': 60 * 1000,   // minutes to milliseconds
+  'h': 60 * 60 * 1000, // hours to milliseconds
+  'd': 24 * 60 * 60 * 1000 // days to milliseconds
+};
+
+// Parsed timeout buffers by their configured string; agent status refreshes re-parse the same few values
+const timeoutBufferCache = new Map();
+
+// Characters to rewrite when deriving an agent ID from its name
+const AGENT_ID_RE = /(\s+)|[^a-z0-9-]/g;
 
 class ConfigManager {
   constructor() {
     this.configPath = path.join(os.homedir(), '.termaite', 'settings.json');
+    this.instructionsPath = path.join(os.homedir(), '.termaite', 'TERMAITE.md');
     this.config = this.loadConfig();
     this.onConfigReload = null; // Callback for when config is reloaded
+    this.instructionsStamp = null; // Stamp of TERMAITE.md at the last propagation
+    this.propagatedStamps = new Map(); // Agent instructions path -> stamp right after we wrote it
 
     // Watch for changes to the config file
     fs.watch(this.configPath, (eventType, filename) => {
@@ -23,7 +42,8 @@ class ConfigManager {
    * @returns {string} The generated ID (lowercase with dashes)
    */
   generateAgentId(name) {
-    return name.toLowerCase().replace(/\s+/g, '-').replace(/[^a-z0-9-]/g, '');
+    // Single pass: whitespace runs become dashes, other invalid characters are dropped
+    return name.toLowerCase().replace(AGENT_ID_RE, (match, whitespace) => (whitespace ? '-' : ''));
   }
 
   /**
@@ -36,23 +56,25 @@ class ConfigManager {
       return 0;
     }
 
-    const match = timeoutBuffer.match(/^(\d+)([smhd])$/);
+    const cached = timeoutBufferCache.get(timeoutBuffer);
+    if (cached !== undefined) {
+      return cached;
+    }
+
+    const match = TIMEOUT_BUFFER_RE.exec(timeoutBuffer);
     if (!match) {
+      // Invalid values are cached as 0 too, so each one is only warned about once
       console.warn(`Invalid timeout buffer format: ${timeoutBuffer}. Expected format: number + unit (s, m, h, d)`);
+      timeoutBufferCache.set(timeoutBuffer, 0);
       return 0;
     }
 
     const value = parseInt(match[1], 10);
     const unit = match[2];
 
-    const multipliers = {
-      's': 1000,        // seconds to milliseconds
-      'm': 60 * 1000,   // minutes to milliseconds
-      'h': 60 * 60 * 1000, // hours to milliseconds
-      'd': 24 * 60 * 60 * 1000 // days to milliseconds
-    };
-
-    return value * multipliers[unit];
+    const milliseconds = value * TIMEOUT_BUFFER_MULTIPLIERS[unit];
+    timeoutBufferCache.set(timeoutBuffer, milliseconds);
+    return milliseconds;
   }
 
   /**
@@ -320,10 +342,11 @@ class ConfigManager {
    */
   findAgent(identifier) {
     const agents = this.config.agents || [];
+    const identifierId = this.generateAgentId(identifier);
     return agents.find(agent => 
       agent.name === identifier || 
       agent.id === identifier ||
-      agent.id === this.generateAgentId(identifier)
+      agent.id === identifierId
     );
   }
 
@@ -348,32 +371,49 @@ class ConfigManager {
   }
 
   /**
-   * Propagate instructions from TERMAITE.md to configured agent instruction files
+   * Propagate instructions from TERMAITE.md to configured agent instruction files.
+   * Runs before every prompt, so files that are already up to date are left untouched.
    */
   propagateInstructions() {
-    const termaiteInstructionsPath = path.join(os.homedir(), '.termaite', 'TERMAITE.md');
-    
     // Check if TERMAITE.md exists
-    if (!fs.existsSync(termaiteInstructionsPath)) {
+    const instructionsStamp = fileStamp(this.instructionsPath);
+    if (instructionsStamp === null) {
       return; // No instructions to propagate
     }
     
-    // Read the TERMAITE.md content
-    const instructions = fs.readFileSync(termaiteInstructionsPath, 'utf8');
+    // New instructions invalidate everything written so far
+    if (instructionsStamp !== this.instructionsStamp) {
+      this.propagatedStamps.clear();
+      this.instructionsStamp = instructionsStamp;
+    }
+    
+    // Read the TERMAITE.md content only if some agent file needs it
+    let instructions = null;
     
     // Propagate to each agent that has an instructionsFilepath configured
     const agents = this.getAgents();
     agents.forEach(agent => {
       if (agent.instructionsFilepath) {
         try {
+          // Skip files that haven't changed since we last wrote them
+          const targetStamp = fileStamp(agent.instructionsFilepath);
+          if (targetStamp !== null && this.propagatedStamps.get(agent.instructionsFilepath) === targetStamp) {
+            return;
+          }
+          
           // Ensure the directory exists
           const dir = path.dirname(agent.instructionsFilepath);
           if (!fs.existsSync(dir)) {
             fs.mkdirSync(dir, { recursive: true });
           }
           
+          if (instructions === null) {
+            instructions = fs.readFileSync(this.instructionsPath, 'utf8');
+          }
+          
           // Write the instructions to the agent's filepath
           fs.writeFileSync(agent.instructionsFilepath, instructions, 'utf8');
+          this.propagatedStamps.set(agent.instructionsFilepath, fileStamp(agent.instructionsFilepath));
         } catch (error) {
           console.error(`Failed to propagate instructions to ${agent.name}: ${error.message}`);
         }
@@ -1,4 +1,5 @@
 const { estimateTokenCount } = require('../utils/tokenEstimator.cjs');
+const { isBlank } = require('../utils/textUtils.cjs');
 const AgentWrapper = require('../services/AgentWrapper.cjs');
 const fs = require('fs');
 
@@ -7,6 +8,28 @@ class HistoryCompactor {
     this.configManager = configManager;
     this.historyManager = historyManager;
     this.globalTimeout = configManager.getGlobalTimeout();
+    this.historyStatsStamp = undefined; // History stamp the cached stats were computed for
+    this.historyStats = { entries: 0, tokens: 0 };
+  }
+
+  /**
+   * Get the entry count and estimated token count of the history.
+   * The file is only re-read when its stamp changed since the last call.
+   * @returns {{entries: number, tokens: number}} History statistics
+   */
+  getHistoryStats() {
+    const stamp = this.historyManager.getHistoryStamp();
+    if (stamp === this.historyStatsStamp) {
+      return this.historyStats;
+    }
+
+    const history = this.historyManager.readHistory();
+    const tokens = history.reduce((total, entry) => {
+      return total + estimateTokenCount(entry.text);
+    }, 0);
+    this.historyStats = { entries: history.length, tokens };
+    this.historyStatsStamp = stamp;
+    return this.historyStats;
   }
 
   /**
@@ -18,7 +41,12 @@ class HistoryCompactor {
     if (agents.length === 0) {
       return 0;
     }
-    return Math.min(...agents.map(agent => agent.contextWindowTokens));
+    // Plain loop: no intermediate array and no spread into call arguments
+    let smallest = Infinity;
+    for (const agent of agents) {
+      smallest = Math.min(smallest, agent.contextWindowTokens);
+    }
+    return smallest;
   }
 
   /**
@@ -27,15 +55,11 @@ class HistoryCompactor {
    * @returns {boolean} True if compaction is needed, false otherwise
    */
   isCompactionNeeded(incomingText = '') {
-    const history = this.historyManager.readHistory();
-    if (history.length === 0) {
+    const { entries, tokens: totalTokenCount } = this.getHistoryStats();
+    if (entries === 0) {
       return false;
     }
     
-    const totalTokenCount = history.reduce((total, entry) => {
-      return total + estimateTokenCount(entry.text);
-    }, 0);
-    
     // Add incoming text tokens as safety buffer if provided
     const incomingTokens = incomingText ? estimateTokenCount(incomingText) : 0;
     const totalWithIncoming = totalTokenCount + incomingTokens;
@@ -72,10 +96,9 @@ class HistoryCompactor {
       };
     }
     
-    // Calculate total token count
-    const totalTokens = history.reduce((total, entry) => {
-      return total + estimateTokenCount(entry.text);
-    }, 0);
+    // Estimate each entry once; totals and the split below reuse these counts
+    const entryTokens = history.map(entry => estimateTokenCount(entry.text));
+    const totalTokens = entryTokens.reduce((total, tokens) => total + tokens, 0);
     
     // Find split point where we have approximately 50% of tokens
     const targetTokens = Math.floor(totalTokens / 2);
@@ -83,7 +106,7 @@ class HistoryCompactor {
     let splitIndex = 0;
     
     for (let i = 0; i < history.length; i++) {
-      cumulativeTokens += estimateTokenCount(history[i].text);
+      cumulativeTokens += entryTokens[i];
       if (cumulativeTokens >= targetTokens) {
         splitIndex = i + 1; // Include this entry in the summary
         break;
@@ -101,15 +124,15 @@ class HistoryCompactor {
     const historyString = historyToSummarize.map(entry => `${entry.sender}: ${entry.text}`).join('\n');
     
     // Calculate token counts for user feedback
-    const tokensToSummarize = historyToSummarize.reduce((total, entry) => total + estimateTokenCount(entry.text), 0);
-    const tokensToKeep = historyToKeep.reduce((total, entry) => total + estimateTokenCount(entry.text), 0);
+    const tokensToSummarize = entryTokens.slice(0, splitIndex).reduce((total, tokens) => total + tokens, 0);
+    const tokensToKeep = totalTokens - tokensToSummarize;
     
     // Request a summary from the agent with enhanced error handling
     try {
       const result = await AgentWrapper.executeAgentCommand(agent, `Please summarize the following chat history as a concise bullet-point list of critical details:\n\n${historyString}`, [], this.globalTimeout);
       
       // Validate the AI response
-      if (!result.stdout || result.stdout.trim() === '') {
+      if (isBlank(result.stdout)) {
         throw new Error(`AI agent returned empty response for summarization (exit code: ${result.exitCode})`);
       }
       
@@ -130,12 +153,8 @@ class HistoryCompactor {
       
       // Write the new history with error handling
       try {
-        // Clear the existing history file
-        this.historyManager.clearHistory();
-        
-        // Write the summary entry and the remaining history
-        this.historyManager.writeHistory(summaryEntry);
-        historyToKeep.forEach(entry => this.historyManager.writeHistory(entry));
+        // Replace the history file with the summary entry and the remaining history
+        this.historyManager.replaceHistory([summaryEntry, ...historyToKeep]);
       } catch (fileError) {
         throw new Error(`Failed to write compacted history to file: ${fileError.message}`);
       }
@@ -191,10 +210,9 @@ class HistoryCompactor {
       };
     }
     
-    // Calculate total token count
-    const totalTokens = history.reduce((total, entry) => {
-      return total + estimateTokenCount(entry.text);
-    }, 0);
+    // Estimate each entry once; totals and the split below reuse these counts
+    const entryTokens = history.map(entry => estimateTokenCount(entry.text));
+    const totalTokens = entryTokens.reduce((total, tokens) => total + tokens, 0);
     
     // Find split point where we keep the specified percentage
     const targetTokens = Math.floor(totalTokens * keepPercentage);
@@ -203,7 +221,7 @@ class HistoryCompactor {
     
     // Work backwards from the end to find where to keep from
     for (let i = history.length - 1; i >= 0; i--) {
-      cumulativeTokens += estimateTokenCount(history[i].text);
+      cumulativeTokens += entryTokens[i];
       if (cumulativeTokens >= targetTokens) {
         splitIndex = i;
         break;
@@ -217,8 +235,8 @@ class HistoryCompactor {
     const historyToRemove = history.slice(0, splitIndex);
     
     // Calculate token counts
-    const tokensToKeep = historyToKeep.reduce((total, entry) => total + estimateTokenCount(entry.text), 0);
-    const tokensToRemove = historyToRemove.reduce((total, entry) => total + estimateTokenCount(entry.text), 0);
+    const tokensToRemove = entryTokens.slice(0, splitIndex).reduce((total, tokens) => total + tokens, 0);
+    const tokensToKeep = totalTokens - tokensToRemove;
     
     // Create a simple summary entry
     const summaryEntry = {
@@ -226,14 +244,11 @@ class HistoryCompactor {
       text: `[Fallback Compaction] Removed ${historyToRemove.length} older entries (${tokensToRemove} tokens) due to AI summarization failure. Kept ${historyToKeep.length} recent entries.`,
       timestamp: new Date().toISOString()
     };
+    const summaryTokens = estimateTokenCount(summaryEntry.text);
     
     try {
-      // Clear the existing history file
-      this.historyManager.clearHistory();
-      
-      // Write the summary entry and the remaining history
-      this.historyManager.writeHistory(summaryEntry);
-      historyToKeep.forEach(entry => this.historyManager.writeHistory(entry));
+      // Replace the history file with the summary entry and the remaining history
+      this.historyManager.replaceHistory([summaryEntry, ...historyToKeep]);
     } catch (fileError) {
       throw new Error(`Failed to write fallback compacted history to file: ${fileError.message}`);
     }
@@ -242,8 +257,8 @@ class HistoryCompactor {
       entriesSummarized: historyToRemove.length,
       entriesKept: historyToKeep.length,
       tokensBeforeCompaction: totalTokens,
-      tokensAfterCompaction: estimateTokenCount(summaryEntry.text) + tokensToKeep,
-      tokensSaved: tokensToRemove - estimateTokenCount(summaryEntry.text),
+      tokensAfterCompaction: summaryTokens + tokensToKeep,
+      tokensSaved: tokensToRemove - summaryTokens,
       method: 'fallback_truncation'
     };
   }
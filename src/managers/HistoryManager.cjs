@@ -2,13 +2,18 @@ const fs = require('fs');
 const path = require('path');
 const os = require('os');
 const crypto = require('crypto');
+const { isBlank } = require('../utils/textUtils.cjs');
+const { statIfExists, fileStamp } = require('../utils/fsUtils.cjs');
 
 class HistoryManager {
   constructor(projectPath) {
     this.projectPath = projectPath;
     this.projectSlug = this.createProjectSlug(projectPath);
+    this.projectDir = path.join(os.homedir(), '.termaite', 'projects', this.projectSlug);
     this.historyPath = this.getHistoryPath();
     this.userInputsPath = this.getUserInputsPath();
+    this.historyCacheStamp = null; // History stamp the cached entries were parsed from
+    this.historyCache = [];
     this.ensureHistoryDirExists();
   }
 
@@ -22,7 +27,7 @@ class HistoryManager {
     const absolutePath = path.resolve(projectPath);
     // Replace slashes with dashes, following Claude's naming convention
     // e.g., /home/patrick/Projects/term.ai.te becomes -home-patrick-Projects-term.ai.te
-    return absolutePath.replace(/\//g, '-');
+    return absolutePath.replaceAll('/', '-');
   }
 
   /**
@@ -30,7 +35,7 @@ class HistoryManager {
    * @returns {string} The path to the history file
    */
   getHistoryPath() {
-    return path.join(os.homedir(), '.termaite', 'projects', this.projectSlug, 'history.jsonl');
+    return path.join(this.projectDir, 'history.jsonl');
   }
 
   /**
@@ -38,32 +43,44 @@ class HistoryManager {
    * @returns {string} The path to the user inputs file
    */
   getUserInputsPath() {
-    return path.join(os.homedir(), '.termaite', 'projects', this.projectSlug, 'user_inputs.jsonl');
+    return path.join(this.projectDir, 'user_inputs.jsonl');
   }
 
   /**
    * Ensure the history directory exists
    */
   ensureHistoryDirExists() {
-    const historyDir = path.dirname(this.historyPath);
-    if (!fs.existsSync(historyDir)) {
-      fs.mkdirSync(historyDir, { recursive: true });
+    if (!fs.existsSync(this.projectDir)) {
+      fs.mkdirSync(this.projectDir, { recursive: true });
     }
   }
 
   /**
-   * Read the chat history from the history file
-   * @returns {array} The chat history
+   * Get a cheap change marker for the history file, used to skip re-reading unchanged history
+   * @returns {string|null} The file's stamp (see fileStamp), or null if the file doesn't exist
+   */
+  getHistoryStamp() {
+    return fileStamp(this.historyPath);
+  }
+
+  /**
+   * Read the chat history from the history file.
+   * Parsed entries are reused until the file's stamp changes.
+   * @returns {array} The chat history (a fresh array the caller may modify)
    */
   readHistory() {
     try {
-      if (!fs.existsSync(this.historyPath)) {
+      const stamp = this.getHistoryStamp();
+      if (stamp === null) {
         return [];
       }
       
-      const data = fs.readFileSync(this.historyPath, 'utf8');
-      const lines = data.split('\n').filter(line => line.trim() !== '');
-      return lines.map(line => JSON.parse(line));
+      if (stamp !== this.historyCacheStamp) {
+        const data = fs.readFileSync(this.historyPath, 'utf8');
+        this.historyCache = HistoryManager.parseJsonLines(data);
+        this.historyCacheStamp = stamp;
+      }
+      return this.historyCache.slice();
     } catch (error) {
       console.error('Error reading history:', error);
       return [];
@@ -87,10 +104,12 @@ class HistoryManager {
    */
   clearHistory() {
     try {
-      if (fs.existsSync(this.historyPath)) {
-        fs.unlinkSync(this.historyPath);
-      }
+      // Unlink directly; a missing file is already cleared
+      fs.unlinkSync(this.historyPath);
     } catch (error) {
+      if (error.code === 'ENOENT') {
+        return;
+      }
       console.error('Error clearing history:', error);
     }
   }
@@ -101,10 +120,14 @@ class HistoryManager {
    */
   replaceHistory(entries) {
     try {
-      // Clear existing history
-      this.clearHistory();
-      // Write all new entries
-      entries.forEach(entry => this.writeHistory(entry));
+      if (entries.length === 0) {
+        this.clearHistory();
+        return;
+      }
+      // Serialize everything up front and write the file in one call,
+      // rather than clearing it and appending entry by entry
+      const data = entries.map(entry => JSON.stringify(entry) + '\n').join('');
+      fs.writeFileSync(this.historyPath, data);
     } catch (error) {
       console.error('Error replacing history:', error);
     }
@@ -133,8 +156,9 @@ class HistoryManager {
         }
         
         const historyPath = path.join(projectsDir, project.name, 'history.jsonl');
-        if (fs.existsSync(historyPath)) {
-          const stats = fs.statSync(historyPath);
+        // One stat call per project; a missing or unreadable history file yields null instead of throwing
+        const stats = statIfExists(historyPath);
+        if (stats) {
           if (stats.mtime.getTime() > mostRecentTime) {
             mostRecentTime = stats.mtime.getTime();
             mostRecent = historyPath;
@@ -149,6 +173,29 @@ class HistoryManager {
     }
   }
 
+  /**
+   * Parse JSONL data into entries, skipping blank lines.
+   * Walks the newlines directly instead of building an intermediate array of lines.
+   * @param {string} data - The JSONL file content
+   * @returns {array} The parsed entries
+   */
+  static parseJsonLines(data) {
+    const entries = [];
+    let start = 0;
+    while (start < data.length) {
+      let end = data.indexOf('\n', start);
+      if (end === -1) {
+        end = data.length;
+      }
+      const line = data.slice(start, end);
+      if (!isBlank(line)) {
+        entries.push(JSON.parse(line));
+      }
+      start = end + 1;
+    }
+    return entries;
+  }
+
   /**
    * Load history from a specific path
    * @param {string} historyPath - The path to the history file
@@ -161,8 +208,7 @@ class HistoryManager {
       }
       
       const data = fs.readFileSync(historyPath, 'utf8');
-      const lines = data.split('\n').filter(line => line.trim() !== '');
-      return lines.map(line => JSON.parse(line));
+      return HistoryManager.parseJsonLines(data);
     } catch (error) {
       console.error('Error loading history from path:', error);
       return [];
@@ -177,12 +223,7 @@ class HistoryManager {
     if (history.length > 0) {
       history.pop();
       // Rewrite the entire history file without the last entry
-      if (fs.existsSync(this.historyPath)) {
-        fs.writeFileSync(this.historyPath, '');
-      }
-      history.forEach(entry => {
-        this.writeHistory(entry);
-      });
+      this.replaceHistory(history);
     }
   }
 
@@ -226,10 +267,15 @@ class HistoryManager {
       }
       
       const content = fs.readFileSync(this.userInputsPath, 'utf8');
-      return content
-        .split('\n')
-        .filter(line => line.trim() !== '')
-        .map(line => line.trim());
+      // Trim each line once, keeping only the non-empty results
+      const inputs = [];
+      for (const line of content.split('\n')) {
+        const trimmed = line.trim();
+        if (trimmed !== '') {
+          inputs.push(trimmed);
+        }
+      }
+      return inputs;
     } catch (error) {
       console.error('Error reading user inputs:', error);
       return [];
@@ -241,10 +287,12 @@ class HistoryManager {
    */
   clearUserInputs() {
     try {
-      if (fs.existsSync(this.userInputsPath)) {
-        fs.unlinkSync(this.userInputsPath);
-      }
+      // Unlink directly; a missing file is already cleared
+      fs.unlinkSync(this.userInputsPath);
     } catch (error) {
+      if (error.code === 'ENOENT') {
+        return;
+      }
       console.error('Error clearing user inputs:', error);
     }
   }
@@ -1,4 +1,5 @@
 const { spawn } = require('child_process');
+const { isBlank } = require('../utils/textUtils.cjs');
 
 class AgentWrapper {
   // Track the current running process for cancellation
@@ -83,14 +84,19 @@ class AgentWrapper {
       let stdout = '';
       let stderr = '';
       
+      // Decode output incrementally as it streams in; multi-byte characters
+      // split across chunk boundaries are carried over to the next chunk
+      process.stdout.setEncoding('utf8');
+      process.stderr.setEncoding('utf8');
+      
       // Collect stdout
       process.stdout.on('data', (data) => {
-        stdout += data.toString();
+        stdout += data;
       });
       
       // Collect stderr
       process.stderr.on('data', (data) => {
-        stderr += data.toString();
+        stderr += data;
       });
       
       // Handle process close
@@ -104,7 +110,7 @@ class AgentWrapper {
         }
         
         // Treat empty stdout as a failure even if exit code is 0
-        if (code === 0 && (!stdout || stdout.trim() === '')) {
+        if (code === 0 && isBlank(stdout)) {
           code = 1; // Set exit code to 1 to indicate failure
         }
         
@@ -166,29 +172,30 @@ class AgentWrapper {
    * @returns {string} The augmented prompt
    */
   static augmentPrompt(input, history) {
-    let augmentedInput = '';
+    // Collect the pieces and join once instead of growing the string piece by piece
+    const parts = [];
     
     // If there's history, include a summary of it for context
     if (history && history.length > 0) {
-      augmentedInput += '=== Previous conversation context ===\\n';
+      parts.push('=== Previous conversation context ===\\n');
       // Include last few exchanges for context (limit to prevent overwhelming the agent)
       const recentHistory = history.slice(-10); // Last 10 messages
       recentHistory.forEach(entry => {
         // Limit each message to 25% of its length
         const maxChars = Math.floor(entry.text.length * 0.25); // 25% of the message length
-        augmentedInput += `${entry.sender}: ${entry.text.substring(0, maxChars)}${entry.text.length > maxChars ? '...' : ''}
-`;
+        parts.push(`${entry.sender}: ${entry.text.substring(0, maxChars)}${entry.text.length > maxChars ? '...' : ''}
+`);
       });
-      augmentedInput += '=== End of context ===\\n\\n';
+      parts.push('=== End of context ===\\n\\n');
     }
     
     // Add the current user input
-    augmentedInput += `Current request: ${input}`;
+    parts.push(`Current request: ${input}`);
     
     // Add a request for a summary at the end
-    augmentedInput += '\n\nIMPORTANT: After completing this task, please provide a comprehensive summary of your actions and conclusions.';
+    parts.push('\n\nIMPORTANT: After completing this task, please provide a comprehensive summary of your actions and conclusions.');
     
-    return augmentedInput;
+    return parts.join('');
   }
 }
 
@@ -0,0 +1,40 @@
+// Rich 256-color palette for agents with good contrast and distinctiveness
+const AGENT_COLORS = [
+  // Bright primary colors
+  '#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEAA7', '#DDA0DD',
+  '#98D8C8', '#F7DC6F', '#BB8FCE', '#85C1E9', '#F8C471', '#82E0AA',
+  // Vibrant secondary colors
+  '#FF8A80', '#80CBC4', '#81C784', '#FFB74D', '#F06292', '#9575CD',
+  '#4FC3F7', '#AED581', '#FFD54F', '#A1887F', '#90A4AE', '#EF5350',
+  // Rich tertiary colors
+  '#26A69A', '#AB47BC', '#5C6BC0', '#42A5F5', '#66BB6A', '#FFCA28',
+  '#FF7043', '#8D6E63', '#78909C', '#EC407A', '#7E57C2', '#29B6F6',
+  // Additional vibrant options
+  '#FFAB91', '#C5E1A5', '#FFF176', '#BCAAA4', '#B0BEC5', '#FFCDD2',
+  '#E1BEE7', '#C8E6C9', '#FFF9C4', '#D7CCC8', '#CFD8DC', '#FFCCBC'
+];
+
+// Cache of agent name -> color so the hash is computed once per agent
+const agentColorCache = new Map();
+
+// Function to deterministically map an agent name to a palette color (hex string)
+// Shared by the TUI, the info line status and the web server so an agent looks the same everywhere
+function getAgentColor(agentName) {
+  const cached = agentColorCache.get(agentName);
+  if (cached) {
+    return cached;
+  }
+
+  let hash = 0;
+  for (let i = 0; i < agentName.length; i++) {
+    const char = agentName.charCodeAt(i);
+    hash = ((hash << 5) - hash) + char;
+    hash = hash & hash; // Convert to 32bit integer
+  }
+
+  const color = AGENT_COLORS[Math.abs(hash) % AGENT_COLORS.length];
+  agentColorCache.set(agentName, color);
+  return color;
+}
+
+module.exports = { getAgentColor };
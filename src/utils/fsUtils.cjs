@@ -0,0 +1,21 @@
+const fs = require('fs');
+
+// Function to stat a path in one call, returning null wherever fs.existsSync would return false
+// Catches every error (not just ENOENT, like throwIfNoEntry), so ENOTDIR and EACCES count as missing too
+function statIfExists(filePath) {
+  try {
+    return fs.statSync(filePath);
+  } catch (error) {
+    return null;
+  }
+}
+
+// Function to get a cheap change marker for a file, or null if it doesn't exist
+// mtime and size alone can miss a same-size edit within one timestamp tick on filesystems with coarse mtimes;
+// the inode and ctime narrow that window (a delete-and-recreate gets a new inode) but cannot close it entirely
+function fileStamp(filePath) {
+  const stats = statIfExists(filePath);
+  return stats ? `${stats.ino}:${stats.mtimeMs}:${stats.ctimeMs}:${stats.size}` : null;
+}
+
+module.exports = { statIfExists, fileStamp };
@@ -0,0 +1,10 @@
+// Matches any non-whitespace character; \s covers the same characters String.prototype.trim removes
+const NON_WHITESPACE_RE = /\S/;
+
+// Function to check whether text is empty or whitespace only
+// Stops at the first non-whitespace character instead of copying the whole string like trim()
+function isBlank(text) {
+  return !text || !NON_WHITESPACE_RE.test(text);
+}
+
+module.exports = { isBlank };